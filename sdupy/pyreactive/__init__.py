@@ -1,25 +1,49 @@
 from sdupy.pyreactive.refresher import wait_for_var
 from .common import is_wrapper, unwrap, unwrap_exception, unwrapped
-from .decorators import reactive, reactive_finalizable
+from .decorators import args_need_reaction, reactive, reactive_finalizable
 from .var import Constant, Var, Wrapped, const, var
 
 
+# the functions below are often called with plain values only; such calls skip building a reactive proxy
+
 @reactive
-def make_list(*args):
+def _make_list(*args):
     return [a for a in args]
 
 
+def make_list(*args):
+    if not args_need_reaction(args, {}):
+        return list(args)
+    return _make_list(*args)
+
+
 @reactive
-def make_tuple(*args):
+def _make_tuple(*args):
     return tuple(args)
 
 
-make_dict = reactive(dict)
+def make_tuple(*args):
+    if not args_need_reaction(args, {}):
+        return args
+    return _make_tuple(*args)
 
 
-def rewrap_dict(d: dict):
-    @reactive
-    def foo(keys, *values):
-        return {k: v for k, v in zip(keys, values)}
+_make_dict = reactive(dict)
 
-    return foo(d.keys(), *d.values())
+
+def make_dict(*args, **kwargs):
+    if not args_need_reaction(args, kwargs):
+        return dict(*args, **kwargs)
+    return _make_dict(*args, **kwargs)
+
+
+@reactive
+def _rewrap_dict(keys, *values):
+    return {k: v for k, v in zip(keys, values)}
+
+
+def rewrap_dict(d: dict):
+    values = tuple(d.values())
+    if not args_need_reaction(values, {}):
+        return dict(d)
+    return _rewrap_dict(d.keys(), *values)
@@ -303,7 +303,6 @@ def reactive_fun(f, result_as_arg, attributes=None):
             result.__dict__.update(**attributes)
 
         def update():
-            print("doing update")
             args_unwrapped, kwargs_unwrapped = rewrap_args(args, kwargs)
             if result_as_arg:
                 res = f(result, *args_unwrapped, **kwargs_unwrapped)
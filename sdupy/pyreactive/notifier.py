@@ -1,6 +1,8 @@
+import inspect
 import logging
 import weakref
 from _weakrefset import WeakSet
+from typing import List
 
 from sdupy.pyreactive.common import NotifyFunc
 from sdupy.pyreactive.refresher import get_default_refresher
@@ -31,6 +33,12 @@ class DummyNotifier:
     def remove_observer(self, notifier: 'Notifier'):
         pass
 
+    def add_sync_observer(self, callback):
+        pass
+
+    def remove_sync_observer(self, callback):
+        pass
+
     def notify_observers(self):
         pass
 
@@ -86,7 +94,10 @@ class ScopedName:
 
 class Notifier:
     def __init__(self, notify_func: NotifyFunc = lambda: True):
-        self._observers = weakref.WeakSet()  # type: Set[Notifier]
+        # weak references to observers; dead ones are dropped when noticed during notification
+        self._observers = []  # type: List[weakref.ref]
+        # weak references to plain callables called directly from notify_observers (see add_sync_observer)
+        self._sync_observers = []  # type: List[weakref.ref]
         self._priority = 0
         self.name = '/'.join(ScopedName.names)
         assert is_notify_func(notify_func)
@@ -102,8 +113,37 @@ class Notifier:
 
     def notify_observers(self):
         self.calls += 1
-        for observer in self._observers:
-            get_default_refresher().schedule_call(observer)
+        if self._sync_observers:
+            self._call_sync_observers()
+        refs = self._observers
+        if not refs:
+            return
+        schedule_call = get_default_refresher().schedule_call
+        alive = []
+        for ref in refs:
+            observer = ref()
+            if observer is not None:
+                alive.append(ref)
+                schedule_call(observer)
+        if len(alive) != len(refs):
+            self._observers = alive
+
+    def _call_sync_observers(self):
+        dead = False
+        for ref in tuple(self._sync_observers):  # a callback may add or remove observers
+            callback = ref()
+            if callback is None:
+                dead = True
+                continue
+            try:
+                callback()
+            except Exception:
+                logger.exception('ignoring exception in sync observer %s of %s', callback, self.name)
+        if dead:
+            self._sync_observers = [ref for ref in self._sync_observers if ref() is not None]
+
+    def _live_observers(self):
+        return [observer for observer in (ref() for ref in self._observers) if observer is not None]
 
     def add_observer(self, observer: 'Notifier'):
         """
@@ -114,13 +154,35 @@ class Notifier:
                        notifications. It's priority will be enforced to be greater than the priority of this object.
         """
         self._update_observer_priority(observer)
-        self._observers.add(observer)
+        ref = weakref.ref(observer)
+        if ref not in self._observers:
+            self._observers.append(ref)
+
+    def add_sync_observer(self, callback):
+        """
+        :param callback: A callable (without arguments) that is called immediately every time the observers are
+                       notified, bypassing the refresher. It's meant for cheap callbacks that don't produce values for
+                       other notifiers, e.g. ones that only tell a Qt widget to repaint. Unlike add_observer() it takes
+                       no part in the ordering of notifications, so it may see the other notifiers not refreshed yet.
+                       It's held weakly (WARNING! it must be owned somewhere else; bound methods are handled).
+        """
+        ref = self._sync_observer_ref(callback)
+        if ref not in self._sync_observers:
+            self._sync_observers.append(ref)
+
+    def remove_sync_observer(self, callback):
+        self._sync_observers.remove(self._sync_observer_ref(callback))
+
+    @staticmethod
+    def _sync_observer_ref(callback):
+        # a bound method object is created anew on each attribute access, so a plain weak reference would die at once
+        return weakref.WeakMethod(callback) if inspect.ismethod(callback) else weakref.ref(callback)
 
     def _update_observer_priority(self, observer: 'Notifier'):
         observer.priority = max(observer.priority, self.priority + 1)
 
     def remove_observer(self, observer: 'Notifier'):
-        self._observers.remove(observer)
+        self._observers.remove(weakref.ref(observer))
 
     @property
     def priority(self):
@@ -130,7 +192,7 @@ class Notifier:
     def priority(self, value):
         assert self._priority is None or self._priority <= value
         self._priority = value
-        for observer in self._observers:
+        for observer in self._live_observers():
             self._update_observer_priority(observer)
 
 
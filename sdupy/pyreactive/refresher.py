@@ -1,8 +1,9 @@
 import asyncio
 import gc
+import heapq
+import itertools
 import logging
-from contextlib import suppress
-from typing import Any, NamedTuple
+from typing import List, Set, Tuple
 
 import sys
 
@@ -13,28 +14,58 @@ logger.addHandler(stderr_logger_handler)
 logger.setLevel(logging.INFO)
 
 
-class QueueItem(NamedTuple):
-    priority: int
-    id: Any  # FIXME: remove id (callable MUST be hashable, we use wrapper if it isn't)
-    notifier: 'Notifier'
-    stats: dict
-
-    def __lt__(self, other):
-        return self.priority < other.priority
-
-
 class AsyncRefresher:
     def __init__(self):
-        self.queue = asyncio.PriorityQueue()
+        # a heap of (priority, sequence number, notifier); the sequence number keeps FIFO order within one priority
+        # and prevents notifiers from being compared
+        self._queue = []  # type: List[Tuple[int, int, Notifier]]
+        # notifiers that are present in the queue; scheduling any of them again is a no-op
+        self._pending = set()  # type: Set[Notifier]
+        self._seq = itertools.count()
         self.task = None  # type: asyncio.Task
+        self._running = False  # the task is started and will process everything that is queued
+        self._loop = None  # type: asyncio.AbstractEventLoop
+
+        # before the queue is drained we wait a moment so that a burst of changes (e.g. dragging a slider) is
+        # coalesced into one refresh; the delay adapts to how many changes arrive while the refresh is running
+        self._min_delay = 1e-4
+        self._max_delay = 2e-2
+        self._delay = self._min_delay
+        self.high_watermark = 100  # don't wait if that many notifications are already pending
+        self._arrivals = 0  # notifications scheduled from outside of the refresher during the current wait and run
+        self._propagating = False
+
+    def set_debounce_range(self, min_delay: float, max_delay: float):
+        """
+        Set the range (in seconds) of the delay before refreshing. Use (0, 0) to disable waiting.
+        """
+        assert 0 <= min_delay <= max_delay
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._delay = min(max(self._delay, min_delay), max_delay)
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        # the loop is looked up once and reused; it's looked up again only if it was closed in the meantime (e.g.
+        # tests use a new loop for each test case)
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            loop = self._loop = asyncio.get_event_loop()
+        return loop
+
+    def _task_is_alive(self):
+        # a task left on a closed loop will never clear _running
+        return self._running and not self._loop.is_closed() and not self.task.done()
 
     def maybe_start_task(self):
-        if not self.task or self.task.done():
-            self.task = asyncio.ensure_future(self.run())  # type: asyncio.Task
+        if not self._task_is_alive():
+            self._running = True
+            self.task = self._get_loop().create_task(self.run())  # type: asyncio.Task
             self.task.add_done_callback(self._handle_done)
 
-    @staticmethod
-    def _handle_done(f):
+    def _handle_done(self, f):
+        if f is self.task:
+            # run() doesn't clear it if the task was cancelled before its first step
+            self._running = False
         if f.cancelled():
             logger.warning('refresh task was cancelled')
             return
@@ -44,53 +75,88 @@ class AsyncRefresher:
             raise e
 
     def schedule_call(self, notifier: 'Notifier'):
-        logger.debug('  scheduled notification ({}) [{:X}] {}'.format(notifier.priority, id(notifier), notifier.name))
-        t = QueueItem(notifier.priority, notifier, notifier, notifier.stats)
-        self.queue.put_nowait(t)
+        if not self._propagating:
+            self._arrivals += 1
+        if notifier not in self._pending:
+            logger.debug('  scheduled notification (%s) [%X] %s', notifier.priority, id(notifier), notifier.name)
+            self._pending.add(notifier)
+            heapq.heappush(self._queue, (notifier.priority, next(self._seq), notifier))
+        # checked also for a notifier that is already queued: if the task that was to process it has died (e.g. it was
+        # cancelled), nothing else would ever start a new one
         self.maybe_start_task()
 
-    async def run(self):
-        gc.collect()
-        update_next = None
+    def _pop(self) -> 'Notifier':
+        """
+        Pop the notifier with the lowest priority. Only one is popped at a time: a notifier with a lower priority may be
+        scheduled while another one is awaited, and it must be refreshed before the ones depending on it.
+        """
+        _, _, notifier = heapq.heappop(self._queue)
+        self._pending.discard(notifier)
+        return notifier
+
+    def _finish(self, notifier: 'Notifier', res):
+        notifier.stats['exception'] = None
+        assert isinstance(res, bool), "res has type {}, should be bool for {}".format(type(res), notifier.name)
+        if res:
+            logger.debug(' notification finished with True, notifying observers')
+            self._propagating = True
+            try:
+                notifier.notify_observers()
+            finally:
+                self._propagating = False
+            logger.debug(' finished')
+        else:
+            logger.debug(' notification finished with False')
 
+    @staticmethod
+    def _failed(notifier: 'Notifier', e: BaseException):
+        logger.error('ignoring exception when in notifying observer %s', notifier, exc_info=e)
+        notifier.stats['exception'] = e
+
+    def _adapt_delay(self, arrivals_ratio: float):
+        if arrivals_ratio > 0.5:
+            # the floor lets the delay grow back also when min_delay is 0
+            self._delay = min(max(self._delay * 2, self._min_delay or 1e-4), self._max_delay)
+        else:
+            self._delay = max(self._delay / 2, self._min_delay)
+
+    async def run(self):
+        try:
+            gc.collect()
+            while self._queue:
+                await self._refresh()
+                gc.collect()  # finalizers may schedule some notifications, so the queue is checked again
+        finally:
+            self._running = False
+
+    async def _refresh(self):
+        # changes of a burst arrive mostly while we wait, so they are counted from before the wait
+        self._arrivals = 0
+        if self._delay > 0 and len(self._pending) < self.high_watermark:
+            await asyncio.sleep(self._delay)
+
+        drained = 0
+        debug = logger.isEnabledFor(logging.DEBUG)
         notified_notifiers = set()
-        with suppress(asyncio.QueueEmpty):  # it's ok - if the queue is empty we just exit
-            while True:
-                notification = update_next if update_next else self.queue.get_nowait()  # type: QueueItem
-                try:
-                    update_next = self.queue.get_nowait()
-                    if update_next.id == notification.id:  # skip notification if is same as next
-                        continue
-                except asyncio.QueueEmpty:
-                    update_next = None
-
-                try:
-                    notification.stats['calls'] = notification.stats.get('calls', 0) + 1
-                    notifier = notification.notifier
-                    if notifier in notified_notifiers:
-                        logger.debug('notifier [{:X}] {} called more than once'.format(id(notifier), notifier.name))
-                    notified_notifiers.add(notifier)
-                    logger.debug('call notification ({}) [{:X}] {}'.format(notifier.priority, id(notifier),
-                                                                           notifier.name))
-
-                    res = notifier.notify()
-                    if asyncio.iscoroutine(res):
-                        res = await res
-                    notification.stats['exception'] = None
-
-                    assert isinstance(res, bool), "res has type {}, should be bool for {}".format(type(res),
-                                                                                                  notifier.name)
-                    if res:
-                        logger.debug(' notification finished with True, notifying observers')
-                        notification.notifier.notify_observers()
-                        logger.debug(' finished')
-                    else:
-                        logger.debug(' notification finished with False')
-
-                except Exception as e:
-                    logger.exception('ignoring exception when in notifying observer {}'.format(notification.notifier))
-                    notification.stats['exception'] = e
-        gc.collect()
+        while self._queue:
+            notifier = self._pop()
+            drained += 1
+            stats = notifier.stats
+            stats['calls'] = stats.get('calls', 0) + 1
+            if debug:
+                if notifier in notified_notifiers:
+                    logger.debug('notifier [%X] %s called more than once', id(notifier), notifier.name)
+                notified_notifiers.add(notifier)
+                logger.debug('call notification (%s) [%X] %s', notifier.priority, id(notifier), notifier.name)
+            try:
+                res = notifier.notify()
+                if asyncio.iscoroutine(res):
+                    # awaited in place: a coroutine that doesn't suspend finishes without a round-trip to the event loop
+                    res = await res
+                self._finish(notifier, res)
+            except Exception as e:
+                self._failed(notifier, e)
+        self._adapt_delay(self._arrivals / max(drained, 1))
 
 
 refresher = None
@@ -1,6 +1,9 @@
 import asyncio
+import logging
 from collections import deque
 
+logger = logging.getLogger(__name__)
+
 
 class Tee:
     def __init__(self, gen):
@@ -35,18 +38,18 @@ class Tee:
 
         index_in_queue = index - self.queue_index_offset
         self.queue[index_in_queue][1] -= 1
-        print("returning")
+        logger.debug("returning")
         return self.queue[index_in_queue][0]
 
     async def _fetch_next(self):
         if not self.finished:
-            print("fetching")
+            logger.debug("fetching")
             if self.fetch_idle.is_set():
-                print("really fetching")
+                logger.debug("really fetching")
                 self.fetch_idle.clear()
                 try:
                     self.queue.append([await self.gen.__anext__(), self.outputs])
-                    print("fetched")
+                    logger.debug("fetched")
                 except StopAsyncIteration:
                     self.finished = True
                 self.fetch_idle.set()
@@ -1,6 +1,7 @@
 import asyncio
 import inspect
 import logging
+import weakref
 from abc import abstractmethod
 from builtins import NotImplementedError
 from contextlib import contextmanager, suppress
@@ -539,10 +540,64 @@ class AsyncReactiveProxy(ReactiveProxy):
         return retval
 
 
-class CmReactiveProxy(ReactiveProxy):
-    def __init__(self, *args, **kwargs):
+def _exit_cm(cm_box: list):
+    cm = cm_box[0]
+    if cm is not None:
+        cm_box[0] = None
+        try:
+            cm.__exit__(None, None, None)
+        except Exception:
+            logging.exception("ignoring exception in cleanup")
+
+
+async def _async_exit_cm(cm_box: list):
+    cm = cm_box[0]
+    if cm is not None:
+        cm_box[0] = None
+        try:
+            await cm.__aexit__(None, None, None)
+        except Exception:
+            logging.exception("ignoring exception in cleanup")
+
+
+def _schedule_async_exit_cm(cm_box: list):
+    if cm_box[0] is None:
+        return
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:  # no loop in this thread
+        loop = None
+    if loop is None or loop.is_closed() or not loop.is_running():
+        # e.g. during the interpreter shutdown; nobody would ever run the coroutine, so don't even create it
+        logging.warning("event loop is not running; can't exit the context manager %r", cm_box[0])
+        return
+    # the coroutine is created only when it's about to be run
+    loop.call_soon_threadsafe(lambda: loop.create_task(_async_exit_cm(cm_box)))
+
+
+class BaseCmReactiveProxy(ReactiveProxy):
+    """
+    The context manager is kept in a box shared with a finalizer (`weakref.finalize`), which exits it when the proxy
+    is garbage collected. The finalizer mustn't reference the proxy itself.
+    """
+
+    def __init__(self, finalizer, *args, **kwargs):
+        self._cm_box = [None]
         super().__init__(*args, **kwargs)
-        self.cm = None
+        weakref.finalize(self, finalizer, self._cm_box)
+
+    @property
+    def cm(self):
+        return self._cm_box[0]
+
+    @cm.setter
+    def cm(self, cm):
+        self._cm_box[0] = cm
+
+
+class CmReactiveProxy(BaseCmReactiveProxy):
+    def __init__(self, *args, **kwargs):
+        super().__init__(_exit_cm, *args, **kwargs)
 
     def _update(self, retval=None):
         self._cleanup()
@@ -553,22 +608,13 @@ class CmReactiveProxy(ReactiveProxy):
             self._set_ref(res)
         return retval
 
-    def __del__(self):
-        self._cleanup()
-
     def _cleanup(self):
-        try:
-            if self.cm:
-                self.cm.__exit__(None, None, None)
-                self.cm = None
-        except Exception:
-            logging.exception("ignoring exception in cleanup")
+        _exit_cm(self._cm_box)
 
 
-class AsyncCmReactiveProxy(ReactiveProxy):
+class AsyncCmReactiveProxy(BaseCmReactiveProxy):
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.cm = None
+        super().__init__(_schedule_async_exit_cm, *args, **kwargs)
 
     async def _update(self, retval=None):
         await self._cleanup()
@@ -579,17 +625,8 @@ class AsyncCmReactiveProxy(ReactiveProxy):
             self._set_ref(res)
         return retval
 
-    def __del__(self):
-        asyncio.ensure_future(self._cleanup())
-
     async def _cleanup(self):
-        try:
-            if self.cm:
-                cm = self.cm
-                self.cm = None
-                await cm.__aexit__(None, None, None)
-        except Exception:
-            logging.exception("ignoring exception in cleanup")
+        await _async_exit_cm(self._cm_box)
 
 
 def volatile(var):
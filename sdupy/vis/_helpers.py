@@ -18,14 +18,22 @@ def image_to_mpl(image: np.ndarray, is_bgr=True):
         if image.shape[2] == 1:
             return image[:, :, 0]
         elif image.shape[2] == 2:
-            return image[..., [0, 0, 0, 1]]
+            rgba = np.empty(image.shape[:2] + (4,), dtype=image.dtype)
+            rgba[..., :3] = image[..., :1]
+            rgba[..., 3] = image[..., 1]
+            return rgba
         elif image.shape[2] == 3:
             if is_bgr:
-                return image[..., [2, 1, 0]]
+                # a view with the channel axis reversed; no copy is made
+                return image[..., ::-1]
                 # return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         elif image.shape[2] == 4:
             if is_bgr:
-                return image[..., [2, 1, 0, 3]]
+                # slice copies are much cheaper than the gather done by fancy indexing
+                rgba = np.empty_like(image)
+                rgba[..., :3] = image[..., 2::-1]
+                rgba[..., 3] = image[..., 3]
+                return rgba
                 # return cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)
         else:
             assert False, "matplotlib supports only 1, 3 or 4 channels in the image (got {})".format(image.shape[2])
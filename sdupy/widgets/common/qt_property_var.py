@@ -1,5 +1,5 @@
 import pyqtgraph as pg
-from PyQt5.QtCore import QObject
+from PyQt5.QtCore import QObject, QTimer
 
 from sdupy.pyreactive.common import Wrapped
 from sdupy.pyreactive.forwarder import ConstForwarders, MutatingForwarders
@@ -10,9 +10,18 @@ class QtSignaledVar(Wrapped, ConstForwarders, MutatingForwarders):
     def __init__(self, signal):
         super().__init__()
         self._notifier = Notifier()
+        self._dirty = False
         signal.connect(self._prop_changed)
 
     def _prop_changed(self):
+        # a widget may emit many signals within one event loop iteration (e.g. when a slider is dragged); observers
+        # are notified once, when the control returns to the event loop
+        if not self._dirty:
+            self._dirty = True
+            QTimer.singleShot(0, self._flush)
+
+    def _flush(self):
+        self._dirty = False
         self._notifier.notify_observers()
 
     def set(self, value):
@@ -44,6 +53,7 @@ class QtPropertyVar(QtSignaledVar):
         self.prop_name = prop_name
         obj_meta = obj.staticMetaObject
         prop_meta = obj_meta.property(obj_meta.indexOfProperty(prop_name))
+        self._prop_meta = prop_meta  # reading/writing through it avoids the lookup of the property by name
         notify_signal_meta = prop_meta.notifySignal()
         assert notify_signal_meta, "property '{}' has no notifier".format(prop_name)
         notify_signal_name = bytes(notify_signal_meta.name()).decode('utf8')
@@ -53,10 +63,10 @@ class QtPropertyVar(QtSignaledVar):
             super().__init__(notify_signal)
 
     def set(self, value):
-        self.obj.setProperty(self.prop_name, value)
+        self._prop_meta.write(self.obj, value)
 
     def get(self):
-        return self.obj.property(self.prop_name)
+        return self._prop_meta.read(self.obj)
 
 
 class QtPropertyVar2(QtSignaledVar):
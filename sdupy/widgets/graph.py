@@ -1,9 +1,10 @@
 from typing import Any, Mapping, Tuple
 
 import networkx as nx
+import numpy as np
 from matplotlib import pyplot as plt
 from matplotlib.artist import Artist
-from matplotlib.backend_bases import MouseEvent
+from matplotlib.backend_bases import DrawEvent, MouseEvent
 from matplotlib.text import Text
 
 from sdupy import reactive_finalizable
@@ -56,31 +57,41 @@ def display_graph(g: nx.Graph, ax: plt.Axes, pos: Mapping[Any, Tuple[float, floa
 
     patches = [make_node(node) for node in nodes]
 
-    node_for_artist = {patch: node for node, patch in zip(nodes, patches)}
+    # window extents of the boxes drawn around the texts as columns x0, y0, x1, y1; they are valid only after the
+    # figure is drawn so they are refreshed on each draw
+    bboxes = None
+    hovered = np.zeros(len(patches), dtype=bool)
 
-    hovered_artists = set()
+    def on_draw(event: DrawEvent):
+        nonlocal bboxes
+        # the extent of a text covers only its glyphs, the box (with its padding) is larger
+        bboxes = np.array([patch.get_bbox_patch().get_window_extent(event.renderer).extents
+                           for patch in patches]).reshape(-1, 4)
 
     def on_plot_hover(event: MouseEvent):
-        axes = None
-        for artist, node in node_for_artist.items():  # type: Tuple[Artist, Any]
-            if artist.contains(event)[0]:
-                if artist not in hovered_artists:
-                    hover_artist(artist)
-                    hovered_artists.add(artist)
-                    axes = artist.axes
+        nonlocal hovered
+        if bboxes is None or event.x is None:
+            return
+        x0, y0, x1, y1 = bboxes.T
+        mask = (x0 <= event.x) & (event.x <= x1) & (y0 <= event.y) & (event.y <= y1)
+        changed = np.flatnonzero(mask != hovered)
+        if len(changed) == 0:
+            return
+        for i in changed:
+            if mask[i]:
+                hover_artist(patches[i])
             else:
-                if artist in hovered_artists:
-                    unhover_artist(artist)
-                    hovered_artists.remove(artist)
-                    axes = artist.axes
-        if axes:
-            axes.get_figure().canvas.draw_idle()
+                unhover_artist(patches[i])
+        hovered = mask
+        ax.get_figure().canvas.draw_idle()
 
+    draw_connection_id = ax.figure.canvas.mpl_connect('draw_event', on_draw)
     connection_id = ax.figure.canvas.mpl_connect('motion_notify_event', on_plot_hover)
 
     yield patches, id
 
     ax.figure.canvas.mpl_disconnect(connection_id)
+    ax.figure.canvas.mpl_disconnect(draw_connection_id)
     for patch in patches:
         patch.remove()
     ax.figure.canvas.draw_idle()
@@ -56,8 +56,8 @@ class TriggerIfVisible(Proxy):
     def _trigger(self):
         if self._is_visible():
             with suppress(Exception):
-                notify_logger.debug('widget {} is visible; updating {}'.format(self.widget.objectName(),
-                                                                              self._other_var.__notifier__.name))
+                notify_logger.debug('widget %s is visible; updating %s', self.widget.objectName(),
+                                    self._other_var.__notifier__.name)
                 self._other_var.__inner__  # trigger run even if the result is not used
         return True
 
@@ -1,8 +1,9 @@
 import logging
+from typing import List, NamedTuple, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
-from PyQt5.QtCore import QAbstractTableModel, Qt
+from PyQt5.QtCore import QAbstractItemModel, QAbstractTableModel, QObject, QRunnable, QThreadPool, Qt, pyqtSignal
 from PyQt5.QtWidgets import QLineEdit
 
 from sdupy import reactive
@@ -32,17 +33,26 @@ class PandasTable(Table):
 class DataTreeModel(QAbstractTableModel):
     def __init__(self, parent=None):
         super().__init__(parent)
-        size = 1000 * 100
-        arr = ((int(n) for n in d) for d in np.array(np.random.randn(size, 4)))
-        # arrs=np.array(list(map(tuple, arr.tolist())), dtype=dict(names=['a', 'b', 'c', 'd'], formats=[np.float]*4))
-        test_data = pd.DataFrame(arr, columns=['a', 'b', 'c', 'd'])
-        self.original_data = test_data
+        self.original_data = pd.DataFrame()
         self.data = self.original_data
+        self._columns = []  # type: List[Sequence]
+        self._values = None  # type: Optional[np.ndarray]
         self.query_is_ok = True
 
         self._sort_columns = []
         self._query = None
 
+        # no parent: a job that is still running when the model is deleted keeps it alive and emits to nobody
+        self._rebuild_signals = _RebuildSignals()
+        self._rebuild_signals.finished.connect(self._rebuild_finished)
+        self._job_running = False
+        self._rebuild_requested = False
+        self._data_check_needed = False  # the original data may have been replaced or changed since the last rebuild
+        self._sort_cache = None  # type: Optional[SortCache]
+        self._query_cache = None  # type: Optional[QueryCache]
+        # the fingerprint of the original data the caches are computed for
+        self._data_fingerprint = None  # type: Optional[DataFingerprint]
+
     def rowCount(self, parent=None):
         return len(self.data)
 
@@ -52,7 +62,9 @@ class DataTreeModel(QAbstractTableModel):
     def data(self, index, role=Qt.DisplayRole):
         if index.isValid():
             if role == Qt.DisplayRole:
-                return str(self.data.iloc[index.row(), index.column()])
+                if self._values is not None:
+                    return str(self._values[index.row(), index.column()])
+                return str(self._columns[index.column()][index.row()])
 
     def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
         if orientation == Qt.Horizontal and role == Qt.DisplayRole:
@@ -60,21 +72,75 @@ class DataTreeModel(QAbstractTableModel):
         if orientation == Qt.Vertical and role == Qt.DisplayRole:
             return self.data.index[section]
 
-    def rebuild_data(self):
-        self.beginResetModel()
-        self.data = self.original_data
-        self.query_is_ok = True
-        try:
-            if self._sort_columns:
-                cols, orders = zip(*reversed(self._sort_columns))
-                self.data = self.data.sort_values(by=list(cols), ascending=list(orders))
-            self.query_is_ok = False
-            if self._query:
-                self.data = self.data.query(self._query)
-                self.query_is_ok = True
-        except Exception:
-            logging.exception("ignoring")
-        self.endResetModel()
+    def rebuild_data(self, reorder_only=False):
+        """
+        Sort and query the original data again. It's done in a worker thread; the views are updated when it finishes.
+        :param reorder_only: The original data is the same as the last time, only the sorting or the query has changed.
+        """
+        self._data_check_needed = self._data_check_needed or not reorder_only
+        if self._job_running:
+            # the result of the running job will be stale; collapse all the requests made meanwhile into one job
+            self._rebuild_requested = True
+        else:
+            self._start_rebuild_job()
+
+    def _start_rebuild_job(self):
+        self._job_running = True
+        self._rebuild_requested = False
+        job = _RebuildJob(self.original_data, list(self._sort_columns), self._query, self._sort_cache,
+                          self._query_cache, self._data_fingerprint, self._data_check_needed, self._rebuild_signals)
+        QThreadPool.globalInstance().start(job)
+
+    def _rebuild_finished(self, result: Optional['_RebuildResult']):
+        self._job_running = False
+        if self._rebuild_requested:
+            self._start_rebuild_job()
+            return
+        if result is None:
+            # the job has failed (and logged why); the current data stay displayed
+            return
+        self._sort_cache = result.sort_cache
+        self._query_cache = result.query_cache
+        self._data_fingerprint = result.data_fingerprint
+        self._data_check_needed = False
+        # with the same contents as before a reset would needlessly lose the selection and the scroll position
+        self._show_data(result, reorder_only=not result.data_changed)
+
+    def _show_data(self, result: '_RebuildResult', reorder_only: bool):
+        data = result.data
+        old_rows = self._new_rows_if_reordered(self.data, data) if reorder_only else None
+        if old_rows is None:
+            self.beginResetModel()
+            self._set_current_data(result)
+            self.endResetModel()
+        else:
+            # the same rows in another order: a layout change keeps the selection, current item and the scroll
+            # position, and lets the view repaint only what is visible
+            self.layoutAboutToBeChanged.emit([], QAbstractItemModel.VerticalSortHint)
+            old_indexes = self.persistentIndexList()
+            new_indexes = [self.index(int(old_rows[index.row()]), index.column()) for index in old_indexes]
+            self.changePersistentIndexList(old_indexes, new_indexes)
+            self._set_current_data(result)
+            self.layoutChanged.emit([], QAbstractItemModel.VerticalSortHint)
+
+    @staticmethod
+    def _new_rows_if_reordered(old: pd.DataFrame, new: pd.DataFrame):
+        """
+        Return the new row number for each old row, or None if `new` is not a permutation of rows of `old`.
+        """
+        if (len(old) != len(new) or not old.columns.equals(new.columns)
+                or not old.index.is_unique or not new.index.is_unique):
+            return None
+        new_rows = new.index.get_indexer(old.index)
+        if (new_rows < 0).any():
+            return None
+        return new_rows
+
+    def _set_current_data(self, result: '_RebuildResult'):
+        self.data = result.data
+        self.query_is_ok = result.query_is_ok
+        self._columns = result.columns
+        self._values = result.values
 
     def sort(self, column: int, order: Qt.SortOrder):
         column_name = self.original_data.columns[column]
@@ -82,17 +148,177 @@ class DataTreeModel(QAbstractTableModel):
         self._sort_columns.append((column_name, order == Qt.AscendingOrder))
         while len(self._sort_columns) > 5:
             self._sort_columns.pop(0)
-        self.rebuild_data()
+        self.rebuild_data(reorder_only=True)
 
     def set_query(self, query: str):
+        query = query.strip() or None
+        if query == self._query:
+            # editingFinished is emitted also when the editor just loses the focus
+            return
         self._query = query
-        self.rebuild_data()
+        self.rebuild_data(reorder_only=True)
 
     def set_data(self, data):
+        # the caches are dropped by the job if it finds out that the contents have changed
         self.original_data = data
         self.rebuild_data()
 
 
+# (column names, dtypes, hashes of the rows)
+DataFingerprint = Tuple[tuple, tuple, np.ndarray]
+# (sort columns, positions of the original rows in the sorted order)
+SortCache = Tuple[Tuple[Tuple[str, bool], ...], np.ndarray]
+# (query, mask of the original rows that match it)
+QueryCache = Tuple[str, np.ndarray]
+
+
+class _RebuildResult(NamedTuple):
+    data: pd.DataFrame
+    query_is_ok: bool
+    columns: List[Sequence]
+    values: Optional[np.ndarray]
+    sort_cache: Optional[SortCache]
+    query_cache: Optional[QueryCache]
+    data_fingerprint: Optional[DataFingerprint]
+    data_changed: bool
+
+
+class _RebuildSignals(QObject):
+    finished = pyqtSignal(object)  # _RebuildResult, or None if the job has failed
+
+
+class _RebuildJob(QRunnable):
+    """
+    Sorts and queries the data in a worker thread, so that the GUI is responsive meanwhile. The result is passed back to
+    the GUI thread by a signal.
+
+    The sort order and the query mask are computed for the original rows separately and are reused when the sorting or
+    the query stays the same (see SortCache and QueryCache).
+
+    :param data_fingerprint: The fingerprint of the data the caches were computed for.
+    :param check_data: The original data may have been changed since then; they are compared by the fingerprint, so
+                       that the caches are dropped and the views are reset only if they really have changed.
+    """
+
+    def __init__(self, original_data: pd.DataFrame, sort_columns: List[Tuple[str, bool]], query: str,
+                 sort_cache: Optional[SortCache], query_cache: Optional[QueryCache],
+                 data_fingerprint: Optional[DataFingerprint], check_data: bool, signals: _RebuildSignals):
+        super().__init__()
+        self.original_data = original_data
+        self.sort_columns = sort_columns
+        self.query = query
+        self.sort_cache = sort_cache
+        self.query_cache = query_cache
+        self.data_fingerprint = data_fingerprint
+        self.check_data = check_data
+        self.signals = signals
+
+    def run(self):
+        result = None
+        try:
+            result = self._rebuild()
+        except Exception:
+            logging.exception("rebuilding data failed")
+        finally:
+            # the model doesn't start another job until this one reports back, so it always does
+            self.signals.finished.emit(result)
+
+    def _rebuild(self) -> '_RebuildResult':
+        data_changed = self._check_data()
+        data = self.original_data
+        query_is_ok = True
+        try:
+            positions = None
+            if self.sort_columns:
+                positions = self._sorted_positions()
+                data = self.original_data.take(positions)
+            query_is_ok = False
+            if self.query:
+                mask = self._query_mask()
+                positions = np.flatnonzero(mask) if positions is None else positions[mask[positions]]
+                data = self.original_data.take(positions)
+                query_is_ok = True
+        except Exception:
+            logging.exception("ignoring")
+        values = self._row_major_values(data)
+        if values is None:
+            columns = [self._column_values(data.iloc[:, i]) for i in range(len(data.columns))]
+        else:
+            columns = []
+        return _RebuildResult(data, query_is_ok, columns, values, self.sort_cache, self.query_cache,
+                              self.data_fingerprint, data_changed)
+
+    def _check_data(self) -> bool:
+        """
+        Tell whether the original data are different from the ones the caches were computed for. The data are compared
+        by their contents, since a frame is often changed in place and passed again.
+        """
+        if not self.check_data:
+            return False
+        fingerprint = self._fingerprint(self.original_data)
+        data_changed = not self._fingerprints_equal(fingerprint, self.data_fingerprint)
+        if data_changed:
+            self.sort_cache = None
+            self.query_cache = None
+        self.data_fingerprint = fingerprint
+        return data_changed
+
+    @staticmethod
+    def _fingerprint(data: pd.DataFrame) -> Optional[DataFingerprint]:
+        """
+        Return something that changes when the contents of `data` change, or None if it can't be computed (e.g. for
+        cells with unhashable objects).
+        """
+        try:
+            return tuple(data.columns), tuple(data.dtypes), pd.util.hash_pandas_object(data, index=True).to_numpy()
+        except TypeError:
+            return None
+
+    @staticmethod
+    def _fingerprints_equal(a: Optional[DataFingerprint], b: Optional[DataFingerprint]) -> bool:
+        return a is not None and b is not None and a[:2] == b[:2] and np.array_equal(a[2], b[2])
+
+    @staticmethod
+    def _row_major_values(data: pd.DataFrame) -> Optional[np.ndarray]:
+        """
+        For a frame with one numpy dtype return its values as a C-contiguous 2D array, so that the cells of a row (which
+        are displayed together) are next to each other in memory. Return None for other frames.
+        """
+        dtypes = set(data.dtypes)
+        if len(dtypes) != 1:
+            return None
+        dtype = dtypes.pop()
+        if not isinstance(dtype, np.dtype) or dtype.kind in 'Mm':
+            return None
+        return np.ascontiguousarray(data.to_numpy())
+
+    def _sorted_positions(self) -> np.ndarray:
+        key = tuple(self.sort_columns)
+        if self.sort_cache is None or self.sort_cache[0] != key:
+            cols, orders = zip(*reversed(self.sort_columns))
+            # only the sorted columns are needed; with a fresh index the sorted index are the positions of the rows
+            keys = self.original_data[list(cols)].reset_index(drop=True)
+            positions = keys.sort_values(by=list(cols), ascending=list(orders)).index.to_numpy()
+            self.sort_cache = (key, positions)
+        return self.sort_cache[1]
+
+    def _query_mask(self) -> np.ndarray:
+        if self.query_cache is None or self.query_cache[0] != self.query:
+            mask = self.original_data.eval(self.query)
+            if not isinstance(mask, pd.Series) or not pd.api.types.is_bool_dtype(mask):
+                raise ValueError("query '{}' doesn't evaluate to a boolean mask".format(self.query))
+            self.query_cache = (self.query, mask.to_numpy(dtype=bool, na_value=False))
+        return self.query_cache[1]
+
+    @staticmethod
+    def _column_values(column: pd.Series) -> Sequence:
+        # cells are read directly from these instead of going through DataFrame.iloc; datetime-like values are kept
+        # in a pandas array so they are displayed as pandas displays them
+        if column.dtype.kind in 'Mm':
+            return column.array
+        return column.to_numpy()
+
+
 @reactive()
 async def append_data_frame(gen):
     res = pd.DataFrame(index=[], columns=['a'])
@@ -3,7 +3,9 @@ import logging
 import time
 from inspect import iscoroutinefunction
 
+import numpy as np
 import pyqtgraph as pg
+from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QColor, QFont
 from PyQt5.QtWidgets import QFileDialog, QHBoxLayout, QLabel, QProgressBar, QPushButton, QVBoxLayout, QWidget
 from pyqtgraph.parametertree import Parameter, ParameterItem, ParameterTree
@@ -86,10 +88,23 @@ def index_to_str(index):
 
 @register_widget("pyqtgraph image view")
 class PgImage(pg.ImageView):
+    CURSOR_POS_MIN_INTERVAL = 1 / 60  # seconds
+
     def __init__(self, parent, name):
         super().__init__(parent, view=pg.PlotItem())
         self.view.setAspectLocked(True)
-        self._show_cursor_proxy = None
+        self._image_shape = None
+        self._x_axis = self._y_axis = self._t_axis = None
+        self._last_pixel = None
+        self._last_data_text = ''
+        self._last_mouse_move = 0.0
+        # the last position of a burst of mouse moves, shown when the rate limit interval ends
+        self._pending_mouse_pos = None
+        self._cursor_pos_timer = QTimer(self)
+        self._cursor_pos_timer.setSingleShot(True)
+        self._cursor_pos_timer.timeout.connect(self._show_pending_cursor_pos)
+        self._show_cursor_pos_at = None
+        self._cursor_pos_slot = None
         self.cursor_pos_label = None
         self.show_cursor_pos()
         self.visibilityChanged = parent.visibilityChanged  # FIXME we assume too much about our parent
@@ -103,31 +118,79 @@ class PgImage(pg.ImageView):
         self.pos_label.setText('')
         self.ui.gridLayout.addWidget(self.pos_label, 2, 0, 2, 1)
 
+    def setImage(self, img, *args, **kwargs):
+        super().setImage(img, *args, **kwargs)
+        self._last_pixel = None
+        # the layout of the image is looked up here, once, instead of on every mouse move
+        if self.image is not None and 'x' in self.axes and 'y' in self.axes:
+            self._x_axis = self.axes['x']
+            self._y_axis = self.axes['y']
+            self._t_axis = self.axes.get('t')
+            self._image_shape = self.image.shape
+        else:
+            self._image_shape = None
+
+    def clear(self):
+        super().clear()
+        self._image_shape = None
+        self._last_pixel = None
+
     def show_cursor_pos(self, show=True):
-        if self._show_cursor_proxy:
-            self._show_cursor_proxy.disconnect()
-            self._show_cursor_proxy = None
+        if self._cursor_pos_slot:
+            self.scene.sigMouseMoved.disconnect(self._cursor_pos_slot)
+            self._cursor_pos_slot = None
+            self._cursor_pos_timer.stop()
+            self._pending_mouse_pos = None
+            self._show_cursor_pos_at = None
         if self.cursor_pos_label is not None:
             self.removeItem(self.cursor_pos_label)
             self.cursor_pos_label = None
 
         if show:
+            def mouseMoved(pos):
+                # connected directly to the scene's signal, so the rate is limited here; a move that comes too early
+                # is shown when the interval ends (unless a newer one replaces it), so the label doesn't stay stale
+                self._pending_mouse_pos = pos
+                if self._cursor_pos_timer.isActive():
+                    return
+                wait = self._last_mouse_move + self.CURSOR_POS_MIN_INTERVAL - time.monotonic()
+                if wait > 0:
+                    self._cursor_pos_timer.start(int(wait * 1000) + 1)
+                else:
+                    self._show_pending_cursor_pos()
+
             @ignore_errors
-            def mouseMoved(evt):
-                view_point = self.view.vb.mapSceneToView(evt[0])
-                text = "x,y = ({:6.1f}, {:6.1f})".format(view_point.x(), view_point.y())
-                if self.image is not None and 'x' in self.axes and 'y' in self.axes:
-                    item_point = self.imageItem.mapFromScene(evt[0])
+            def showCursorPos(pos):
+                view_point = self.view.vb.mapSceneToView(pos)
+                text = f"x,y = ({view_point.x():6.1f}, {view_point.y():6.1f})"
+                shape = self._image_shape
+                if shape is not None:
+                    item_point = self.imageItem.mapFromScene(pos)
                     ix = int(item_point.x())
                     iy = int(item_point.y())
-                    if 0 <= ix < self.image.shape[self.axes['x']] and 0 <= iy < self.image.shape[self.axes['y']]:
-                        index = [slice(None, None)] * len(self.image.shape)
-                        index[self.axes['x']] = ix
-                        index[self.axes['y']] = iy
-                        if self.axes.get('t') is not None:
-                            index[self.axes['t']] = self.currentIndex
-                        val = self.image[tuple(index)]
-                        text += "    data[{}] = {}".format(index_to_str(index), val)
+                    x_axis = self._x_axis
+                    y_axis = self._y_axis
+                    if 0 <= ix < shape[x_axis] and 0 <= iy < shape[y_axis]:
+                        pixel = (ix, iy, self.currentIndex)
+                        if pixel != self._last_pixel:
+                            # the value is read and formatted only when the cursor enters another pixel
+                            if len(shape) == 2:
+                                index = (ix, iy) if x_axis == 0 else (iy, ix)
+                            else:
+                                index = [slice(None, None)] * len(shape)
+                                index[x_axis] = ix
+                                index[y_axis] = iy
+                                if self._t_axis is not None:
+                                    index[self._t_axis] = self.currentIndex
+                                index = tuple(index)
+                            val = self.image[index]
+                            if isinstance(val, (np.integer, np.bool_)):
+                                # formatting a python scalar is cheaper; floats are left alone since e.g. float32
+                                # would be displayed with spurious digits
+                                val = val.item()
+                            self._last_data_text = f"    data[{index_to_str(index)}] = {val}"
+                            self._last_pixel = pixel
+                        text += self._last_data_text
                 #self.cursor_pos_label.setText(text)
                 self.pos_label.setText(text)
                 # if all(isfinite(c) for c in [view_point.x(), view_point.y()]):
@@ -138,7 +201,15 @@ class PgImage(pg.ImageView):
             #self.cursor_pos_label = pg.TextItem(anchor=(0, 1))
             #self.addItem(self.cursor_pos_label)
 
-        self._show_cursor_proxy = pg.SignalProxy(self.scene.sigMouseMoved, rateLimit=60, slot=mouseMoved)
+            self._show_cursor_pos_at = showCursorPos
+            self.scene.sigMouseMoved.connect(mouseMoved)
+            self._cursor_pos_slot = mouseMoved
+
+    def _show_pending_cursor_pos(self):
+        pos, self._pending_mouse_pos = self._pending_mouse_pos, None
+        if pos is not None and self._show_cursor_pos_at is not None:
+            self._last_mouse_move = time.monotonic()
+            self._show_cursor_pos_at(pos)
 
     def dump_state(self):
         return dict(
@@ -383,6 +454,7 @@ class TaskParameter(Parameter):
         self.task = None  # type: asyncio.Task
         self.progress = None  # type: float
         self.status = None  # type: str
+        self._progress_changed = None  # type: asyncio.Event
         #self.progress_param = self.addChild(dict(name="progress", type='float', readonly=True, value=0))
         #self.state_param = self.addChild(dict(name="state", type='str', readonly=True, value=0))
         #self.result_param = self.addChild(dict(name="result", type='text', readonly=True))
@@ -404,20 +476,31 @@ class TaskParameter(Parameter):
         self.progress = 0.0
         self.status = ''
         self.sigValueChanged.emit(self, None)
-        await asyncio.sleep(0.001)
-        if iscoroutinefunction(self.func):
-            await self.func(self.checkpoint)
-        else:
-            await make_async_using_thread(self.func)(make_sync(self.checkpoint))
+        self._progress_changed = asyncio.Event()
+        show_progress_task = asyncio.ensure_future(self._show_progress(self._progress_changed))
+        try:
+            if iscoroutinefunction(self.func):
+                await self.func(self.checkpoint)
+            else:
+                await make_async_using_thread(self.func)(make_sync(self.checkpoint))
+        finally:
+            show_progress_task.cancel()
         self.sigValueChanged.emit(self, None)
 
+    async def _show_progress(self, progress_changed: asyncio.Event):
+        # all the checkpoints passed since the last update are displayed at once
+        while True:
+            await progress_changed.wait()
+            progress_changed.clear()
+            self.sigValueChanged.emit(self, None)
+
     async def checkpoint(self, progress, status=None):
         if status != self.status or abs(progress - self.progress) >= 0.01:
             print("{:14.3f} {:5.1f}% {}".format(time.time(), progress*100, status))
         self.progress = progress
         self.status = status
-        self.sigValueChanged.emit(self, None)
-        await asyncio.sleep(0.001)  # allow qt to repaint ans handle some queued events
+        self._progress_changed.set()
+        await asyncio.sleep(0)  # allow qt to repaint and handle some queued events
 
 
 class ActionParameterItem(ParameterItem):
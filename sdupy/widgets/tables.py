@@ -1,16 +1,16 @@
+import ast
 import asyncio
 import io
 import traceback
-from typing import Any, Callable, List, NamedTuple
-import gc
+from collections import deque
+from contextlib import suppress
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
-from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QTimer, Qt, pyqtSignal
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QTableView, QVBoxLayout, QWidget
 
-from sdupy.pyreactive import unwrap_exception
-from sdupy.pyreactive.notifier import Notifier, ScopedName
 from sdupy.utils import ignore_errors
 from sdupy.widgets.helpers import trigger_if_visible
 from .common.register import register_widget
@@ -47,20 +47,40 @@ class VarsTable(Table):
         self._table_view.setModel(self.model)
 
         self.insert_var = self.model.insert_var
+        self.insert_vars = self.model.insert_vars
         self.remove_var = self.model.remove_var
         self.clear = self.model.clear
 
 
 class VarsModel(QAbstractTableModel):
-    class VarInList(NamedTuple):
-        name: str
-        var: Wrapped
-        notifier: Notifier
-        to_value: Callable[[str], Any]
+    class VarInList:
+        def __init__(self, name: str, var: Wrapped, to_value: Callable[[str], Any]):
+            self.name = name
+            self.var = var
+            self.to_value = to_value
+            # a sync observer of the var; it's held weakly by the notifier
+            self.on_changed = None  # type: Callable[[], None]
+            # the displayed text of the value and whether it's an exception; computed when displayed, cleared when
+            # the var changes
+            self.text = None  # type: Optional[str]
+            self.is_error = False
+
+        def update_text(self):
+            try:
+                self.text = str(unwrap(self.var))
+                self.is_error = False
+            except Exception as e:
+                lines = []
+                while e:
+                    lines.append('{{{}}} {}'.format(e.__class__.__name__, e))
+                    e = e.__cause__
+                self.text = '\n'.join(lines)
+                self.is_error = True
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.vars = []  # type: List[VarsModel.VarInList]
+        self._rows = {}  # type: Dict[str, int]  # row of each var by its name (names are unique)
 
     @ignore_errors
     def rowCount(self, parent=None):
@@ -78,18 +98,14 @@ class VarsModel(QAbstractTableModel):
                     if index.column() == 0:
                         return item.name
                     elif index.column() == 1:
-                        try:
-                            return str(unwrap(item.var))
-                        except Exception as e:
-                            lines = []
-                            while e:
-                                lines.append('{{{}}} {}'.format(e.__class__.__name__, e))
-                                e = e.__cause__
-                            return '\n'.join(lines)
+                        if item.text is None:
+                            item.update_text()
+                        return item.text
                 if role == Qt.BackgroundColorRole:
                     if index.column() == 1:
-                        exception = unwrap_exception(item.var)
-                        if exception is not None:
+                        if item.text is None:
+                            item.update_text()
+                        if item.is_error:
                             return QColor('red')
 
     @ignore_errors
@@ -114,36 +130,58 @@ class VarsModel(QAbstractTableModel):
         return super().setData(index, value, role)
 
     def remove_var(self, name):
-        indices_for_removal = [i for i, var_in_the_list in enumerate(self.vars) if var_in_the_list.name == name]
-
-        for i in reversed(indices_for_removal):
+        i = self._rows.pop(name, None)
+        if i is not None:
             self.beginRemoveRows(QModelIndex(), i, i)
             del self.vars[i]
+            for row in range(i, len(self.vars)):
+                self._rows[self.vars[row].name] = row
             self.endRemoveRows()
 
     def clear(self):
         if len(self.vars) > 0:
             self.beginRemoveRows(QModelIndex(), 0, len(self.vars) - 1)
             self.vars.clear()
+            self._rows.clear()
             self.endRemoveRows()
 
     def insert_var(self, name: str, var: Wrapped, to_value: Callable[[str], Any]):
-        assert var is not None
-        self.remove_var(name)
+        self.insert_vars([(name, var, to_value)])
 
-        def notify_changed():
-            for i, var_in_the_list in enumerate(self.vars):
-                if var_in_the_list.var is var:
-                    self.dataChanged.emit(self.index(i, 1), self.index(i, 1))
-            return True
+    def insert_vars(self, items: Iterable[Tuple[str, Wrapped, Callable[[str], Any]]]):
+        """
+        Insert many (name, var, to_value) at once; the views get one notification about all the new rows.
+        """
+        # a var replaces the one with the same name (also one inserted earlier in this call)
+        items = list({name: (name, var, to_value) for name, var, to_value in items}.values())
+        for name, var, _ in items:
+            assert var is not None
+            self.remove_var(name)
+        if not items:
+            return
+
+        first = len(self.vars)
+        self.beginInsertRows(QModelIndex(), first, first + len(items) - 1)
+        for name, var, to_value in items:
+            self._rows[name] = len(self.vars)
+            self.vars.append(self._make_var_in_list(name, var, to_value))
+        self.endInsertRows()
 
-        with ScopedName('var {} in table'.format(name)):
-            notifier = Notifier(notify_changed)
-        var.__notifier__.add_observer(notifier)
+    def _make_var_in_list(self, name: str, var: Wrapped, to_value: Callable[[str], Any]) -> 'VarsModel.VarInList':
+        item = VarsModel.VarInList(name=name, var=var, to_value=to_value)
 
-        self.beginInsertRows(QModelIndex(), len(self.vars), len(self.vars))
-        self.vars.append(VarsModel.VarInList(name=name, var=var, notifier=notifier, to_value=to_value))
-        self.endInsertRows()
+        # it only tells the views to repaint a row, so it's called directly instead of being scheduled; the item is
+        # looked up instead of captured, as the item holds this function and a cycle would keep it alive (and observing)
+        # after the row is removed
+        def notify_changed():
+            i = self._rows.get(name)
+            if i is not None:
+                self.vars[i].text = None
+                self.dataChanged.emit(self.index(i, 1), self.index(i, 1))
+
+        item.on_changed = notify_changed
+        var.__notifier__.add_sync_observer(notify_changed)
+        return item
 
     @ignore_errors
     def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
@@ -181,7 +219,6 @@ class ArrayTable(QWidget):
     def var(self, new_var):
         self._var = new_var
         self._setter = None
-        gc.collect()
         self.update()
 
     @property
@@ -203,6 +240,8 @@ class ArrayTable(QWidget):
 
 
 class ArrayModel(QAbstractTableModel):
+    TEXT_BLOCK_SIZE = 256  # rows formatted at once
+
     def __init__(self, array: np.ndarray, parent=None):
         super().__init__(parent)
         if array is None:
@@ -210,11 +249,18 @@ class ArrayModel(QAbstractTableModel):
         assert hasattr(array, 'shape'), "expected array, got {} of type {}".format(array, type(array))
         assert hasattr(array, '__getitem__')
         self._array = array  # type: np.ndarray
-        self.format = None
+        # texts of cells, formatted in blocks of rows when any of them is displayed for the first time
+        self._texts = {}  # type: Dict[Tuple[int, int], List[Optional[str]]]
+        self._format = None
         if self._array.ndim >= 2:
             self._columns = list(range(self._array.shape[1]))
         else:
             self._columns = self._array.dtype.names
+        # the size is looked up for every painted cell; it doesn't change, so it's kept here
+        self._rows = self._array.shape[0] if len(self._array.shape) > 0 else 0
+        self._cols = len(self._columns) if self._columns is not None else 0
+        # flags are the same for all the cells; they are asked for every painted cell, so they are computed once
+        self._cell_flags = None
 
         # if array.shape[0]>0:
         #     self.beginInsertRows(QModelIndex(), 0, array.shape[0]-1)
@@ -228,11 +274,20 @@ class ArrayModel(QAbstractTableModel):
 
     @ignore_errors(retval=0)
     def rowCount(self, parent=None):
-        return self._array.shape[0]
+        return self._rows
 
     @ignore_errors(retval=0)
     def columnCount(self, parent=None):
-        return len(self._columns)
+        return self._cols
+
+    @property
+    def format(self):
+        return self._format
+
+    @format.setter
+    def format(self, format_: str):
+        self._format = format_
+        self._texts.clear()
 
     @ignore_errors
     def data(self, index: QModelIndex, role=Qt.DisplayRole):
@@ -240,31 +295,70 @@ class ArrayModel(QAbstractTableModel):
         assert isinstance(self.format, str)
         if self._index_is_good(index):
             if role in [Qt.DisplayRole, Qt.EditRole, Qt.ToolTipRole, Qt.StatusTipRole]:
-                res = self.format.format(self._array[index.row()][index.column()])
-                return res
+                block, row_in_block = divmod(index.row(), self.TEXT_BLOCK_SIZE)
+                column = index.column()
+                texts = self._texts.get((block, column))
+                if texts is None:
+                    texts = self._texts[block, column] = self._format_block(block, column)
+                return texts[row_in_block]
+
+    def _format_block(self, block: int, column: int) -> List[Optional[str]]:
+        start = block * self.TEXT_BLOCK_SIZE
+        rows = self._array[start:start + self.TEXT_BLOCK_SIZE]
+        format_ = self._format.format
+        try:
+            if self._format == '{}' and isinstance(rows, np.ndarray):
+                values = rows[:, column] if rows.ndim >= 2 else rows[self._columns[column]]
+                # numpy converts a whole column to the same texts as str() gives for each of its numbers, but without
+                # formatting them one by one in python; it's not the case for other floats than float64 (e.g. '{}' of
+                # np.float32(0.1) is '0.10000000149011612', while numpy gives '0.1')
+                if values.ndim == 1 and (values.dtype.kind in 'biu' or values.dtype == np.float64):
+                    return values.astype(str).tolist()
+            return [format_(row[column]) for row in rows]
+        except Exception:
+            return [self._format_cell(format_, row, column) for row in rows]
+
+    @staticmethod
+    def _format_cell(format_: Callable[[Any], str], row, column: int) -> Optional[str]:
+        try:
+            return format_(row[column])
+        except Exception:
+            # only this cell stays empty; the rest of the block is displayed and cached as usual
+            logging.exception("cannot format cell in column %s", column)
+            return None
 
     @ignore_errors(retval=Qt.ItemFlags())
     def flags(self, index: QModelIndex):
         if self._index_is_good(index):
-            return super().flags(index) | (Qt.ItemIsEditable if True else 0)
+            if self._cell_flags is None:
+                self._cell_flags = super().flags(index) | Qt.ItemIsEditable
+            return self._cell_flags
         return super().flags(index)
 
     def _index_is_good(self, index: QModelIndex):
-        res = (index.isValid()
-               and index.row() < self._array.shape[0]
-               and index.column() < len(self._columns))
-        return res
+        return index.isValid() and index.row() < self._rows and index.column() < self._cols
 
     @ignore_errors
     def setData(self, index: QModelIndex, value: Any, role: int):
         if self._index_is_good(index):
             try:
-                self._array[index.row()][index.column()] = eval(value)
+                self._array[index.row()][index.column()] = self._parse_value(value)
+                self._texts.pop((index.row() // self.TEXT_BLOCK_SIZE, index.column()), None)
             except Exception as e:
                 logging.exception('exception during setting var (ignoring)')
             return True
         return super().setData(index, value, role)
 
+    def _parse_value(self, text: str):
+        dtype = self._array.dtype
+        if dtype.kind in 'US':
+            return text
+        if dtype.kind in 'iufc':
+            # numpy's own parser; it fails e.g. for '1.5' in an integer array, so let's try a python literal then
+            with suppress(ValueError):
+                return np.asarray(text.strip()).astype(dtype)
+        return ast.literal_eval(text)
+
     @ignore_errors
     def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
         if role == Qt.DisplayRole:
@@ -286,11 +380,20 @@ import logging.handlers
 
 
 class LogRecordsModel(QAbstractTableModel, logging.Handler):
+    FLUSH_INTERVAL_MS = 50
+
+    # emitted (possibly from other threads) when the first record is waiting for the flush
+    _records_pending = pyqtSignal()
+
     def __init__(self):
         super().__init__()
-        self.records = []  # type: List[logging.LogRecord]
         self.columns = ['timestamp', 'name', 'level', 'message', 'path', 'file']
         self.records_limit = 100000
+        # a ring buffer of the displayed records together with their texts for each column (formatted once, not on
+        # every repaint); row 0 is at _head, the oldest records are overwritten when it's full
+        self._buf = [None] * self.records_limit  # type: List[Tuple[logging.LogRecord, Tuple[str, ...]]]
+        self._head = 0
+        self._len = 0
         self.bg_colors = {
             logging.CRITICAL: QColor(Qt.magenta).lighter(),
             logging.ERROR: QColor(Qt.red).lighter(),
@@ -299,54 +402,92 @@ class LogRecordsModel(QAbstractTableModel, logging.Handler):
             logging.DEBUG: QColor(Qt.cyan).lighter(),
         }
 
-    def emit(self, record: logging.LogRecord):
-        if len(self.records) > self.records_limit:
-            chunk_size = 10
-            self.beginRemoveRows(QModelIndex(), 0, chunk_size - 1)
-            del self.records[0:chunk_size]  # it's probably faster to remove in greater chunks
-            self.endRemoveRows()
+        # records are buffered and inserted into the model in batches, so that a burst of logs doesn't result in
+        # a row insertion (and a view update) per record
+        self._pending = deque()  # type: Deque[logging.LogRecord]
+        self._flush_requested = False
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self._flush)
+        self._records_pending.connect(self._flush_timer.start, Qt.QueuedConnection)
 
+    def emit(self, record: logging.LogRecord):
         try:
-            self.beginInsertRows(QModelIndex(), len(self.records), len(self.records))
-            self.records.append(record)
-            self.endInsertRows()
+            # formatted once, here, like logging.Formatter does; it also captures the arguments as they are now
+            record.message = record.getMessage()
+            self._pending.append(record)
+            if not self._flush_requested:
+                self._flush_requested = True
+                self._records_pending.emit()
         except Exception:
             self.handleError(record)
 
+    def _flush(self):
+        self._flush_requested = False
+        pending = self._pending
+        buf = self._buf
+        capacity = len(buf)
+        new_records = [pending.popleft() for _ in range(len(pending))][-capacity:]
+        if not new_records:
+            return
+
+        overflow = self._len + len(new_records) - capacity
+        if overflow > 0:
+            # the slots of the removed records are overwritten below
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            self._head = (self._head + overflow) % capacity
+            self._len -= overflow
+            self.endRemoveRows()
+
+        first = self._len
+        self.beginInsertRows(QModelIndex(), first, first + len(new_records) - 1)
+        for i, record in enumerate(new_records, self._head + first):
+            buf[i % capacity] = (record, self._format_record(record))
+        self._len += len(new_records)
+        self.endInsertRows()
+
+    def _format_record(self, record: logging.LogRecord) -> Tuple[str, ...]:
+        message = record.message
+        if record.exc_info:
+            message += " (see tooltop for more)"
+        texts = dict(
+            timestamp='{:.3f}'.format(record.relativeCreated),
+            name=record.name,
+            level=record.levelname,
+            message=message,
+            path=record.pathname,
+            file=record.filename + ":" + str(record.lineno),
+        )
+        return tuple(texts[col_name] for col_name in self.columns)
+
+    def _entry(self, row: int) -> Tuple[logging.LogRecord, Tuple[str, ...]]:
+        return self._buf[(self._head + row) % len(self._buf)]
+
     def __repr__(self):
         level = logging.getLevelName(self.level)
         return '<%s (%s)>' % (self.__class__.__name__, level)
 
     def rowCount(self, parent=None):
-        return len(self.records)
+        return self._len
 
     def columnCount(self, parent=None):
         return len(self.columns)
 
     def data(self, index, role=Qt.DisplayRole):
         if index.isValid():
-            if index.row() < len(self.records) and index.column() < len(self.columns):
-                record = self.records[index.row()]
-                col_name = self.columns[index.column()]
-                if role == Qt.DisplayRole or role == Qt.ToolTipRole:
-                    if col_name == 'message':
-                        if record.exc_info:
-                            if role == Qt.ToolTipRole:
-                                return record.getMessage() + '\n' + self.formatException(record.exc_info)
-                            else:
-                                return record.getMessage() + " (see tooltop for more)"
-                        else:
-                            return record.getMessage()
-                    elif col_name == 'level':
-                        return record.levelname
-                    elif col_name == 'timestamp':
-                        return '{:.3f}'.format(record.relativeCreated)
-                    elif col_name == 'path':
-                        return record.pathname
-                    elif col_name == 'file':
-                        return record.filename + ":" + str(record.lineno)
-                    elif col_name == 'name':
-                        return record.name
+            if index.row() < self._len and index.column() < len(self.columns):
+                record, texts = self._entry(index.row())
+                if role == Qt.DisplayRole:
+                    return texts[index.column()]
+                elif role == Qt.ToolTipRole:
+                    if record.exc_info and self.columns[index.column()] == 'message':
+                        # the traceback is formatted when it's needed for the first time and kept in the record (like
+                        # logging.Formatter does)
+                        if not record.exc_text:
+                            record.exc_text = self.formatException(record.exc_info)
+                        return record.message + '\n' + record.exc_text
+                    return texts[index.column()]
                 elif role == Qt.BackgroundColorRole:
                     # TODO interpolate between two nearest?
                     if record.levelno in self.bg_colors:
@@ -3,12 +3,14 @@ import gc
 
 import asynctest
 
-from sdupy.pyreactive import wait_for_var
+from sdupy.pyreactive import make_dict, make_list, make_tuple, rewrap_dict, wait_for_var
 from sdupy.pyreactive.common import Wrapped, unwrap, unwrap_exception, unwrapped
 from sdupy.pyreactive.decorators import reactive, reactive_finalizable
 # from sdupy.reactive.decorators import reactive, reactive_finalizable, var_from_gen
 # from sdupy.reactive.var import Observable, var, Wrapper
 from sdupy.pyreactive.notifier import Notifier
+import sdupy.pyreactive.refresher
+from sdupy.pyreactive.refresher import AsyncRefresher, get_default_refresher
 from sdupy.pyreactive.var import var
 
 
@@ -44,6 +46,156 @@ class NotifierTests(asynctest.TestCase):
         self.assertEqual(self.cbk_called, 1)
 
 
+class SyncObserverTests(asynctest.TestCase):
+    def setUp(self):
+        self._notifier = Notifier()
+        self.cbk_called = 0
+
+    def cbk(self):
+        self.cbk_called += 1
+        return False
+
+    async def test_sync_observer(self):
+        called = 0
+
+        def sync_cbk():
+            nonlocal called
+            called += 1
+
+        self._notifier.add_sync_observer(sync_cbk)
+        self._notifier.notify_observers()
+        self.assertEqual(called, 1)  # called immediately, without waiting for the refresher
+
+        self._notifier.remove_sync_observer(sync_cbk)
+        self._notifier.notify_observers()
+        self.assertEqual(called, 1)
+
+    async def test_sync_observer_is_weak(self):
+        self._notifier.add_sync_observer(self.cbk)
+        self._notifier.notify_observers()
+        self.assertEqual(self.cbk_called, 1)
+
+        def sync_cbk():
+            pass
+
+        self._notifier.add_sync_observer(sync_cbk)
+        del sync_cbk
+        gc.collect()
+        self._notifier.notify_observers()
+        self.assertEqual(self.cbk_called, 2)
+        self.assertEqual(len(self._notifier._sync_observers), 1)
+
+
+class RefresherTests(asynctest.TestCase):
+    def setUp(self):
+        # the tests change the state of the refresher, so they get their own one
+        self._default_refresher = sdupy.pyreactive.refresher.refresher
+        sdupy.pyreactive.refresher.refresher = AsyncRefresher()
+        self._notifier = Notifier()
+        self._notifier2 = Notifier(self.cbk)
+        self.cbk_called = 0
+
+    def tearDown(self):
+        sdupy.pyreactive.refresher.refresher = self._default_refresher
+
+    def cbk(self):
+        self.cbk_called += 1
+        return False
+
+    async def test_dont_call_multiple_interleaved(self):
+        other_called = 0
+
+        def other_cbk():
+            nonlocal other_called
+            other_called += 1
+            return False
+
+        other_notifier = Notifier(other_cbk)
+        self._notifier.add_observer(self._notifier2)
+        self._notifier.add_observer(other_notifier)
+
+        for i in range(10):
+            self._notifier.notify_observers()
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.cbk_called, 1)
+        self.assertEqual(other_called, 1)
+
+    async def test_lower_priority_scheduled_while_awaiting(self):
+        called = []
+
+        def sync_cbk(name, res):
+            def cbk():
+                called.append(name)
+                return res
+            return cbk
+
+        async def async_cbk():
+            source.notify_observers()
+            await asyncio.sleep(0)
+            called.append('a')
+            return False
+
+        source = Notifier()
+        p = Notifier(sync_cbk('p', True))
+        b = Notifier(sync_cbk('b', False))
+        source.add_observer(p)
+        p.add_observer(b)
+        a = Notifier(async_cbk)
+        c = Notifier(sync_cbk('c', False))
+        a.priority = c.priority = b.priority
+
+        refresher = get_default_refresher()
+        for notifier in [a, c, b]:
+            refresher.schedule_call(notifier)
+        await asyncio.sleep(0.1)
+        self.assertEqual(called.count('b'), 1)
+        self.assertLess(called.index('p'), called.index('b'))
+
+    async def test_notify_after_task_cancelled(self):
+        self._notifier.add_observer(self._notifier2)
+        self._notifier.notify_observers()
+        await asyncio.sleep(0)  # the task waits before refreshing now
+        get_default_refresher().task.cancel()
+        await asyncio.sleep(0)
+
+        self._notifier.notify_observers()
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.cbk_called, 1)
+
+    async def test_notify_after_task_cancelled_before_start(self):
+        self._notifier.add_observer(self._notifier2)
+        self._notifier.notify_observers()
+        get_default_refresher().task.cancel()
+        await asyncio.sleep(0)
+
+        self._notifier.notify_observers()
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.cbk_called, 1)
+
+    async def test_burst_is_coalesced(self):
+        self._notifier.add_observer(self._notifier2)
+        get_default_refresher().set_debounce_range(0.5, 0.5)
+        for i in range(10):
+            self._notifier.notify_observers()
+            await asyncio.sleep(0)  # let the refresher run, if it didn't wait
+        await wait_for_var()
+        self.assertEqual(self.cbk_called, 1)
+
+    def test_adapt_delay(self):
+        refresher = AsyncRefresher()
+        refresher.set_debounce_range(0, 0.01)
+        for i in range(10):
+            refresher._adapt_delay(0.0)
+        self.assertLess(refresher._delay, 1e-6)
+
+        refresher._adapt_delay(1.0)  # many changes arrived while waiting and refreshing
+        self.assertGreaterEqual(refresher._delay, 1e-4)
+        for i in range(10):
+            refresher._adapt_delay(1.0)
+        self.assertEqual(refresher._delay, 0.01)
+
+
 @reactive
 def my_sum(a, b):
     return a + b
@@ -99,6 +251,24 @@ class SimpleReactive(asynctest.TestCase):
             unwrap(res)
 
 
+class MakeContainers(asynctest.TestCase):
+    async def test_vals(self):
+        self.assertEqual(make_list(1, 2), [1, 2])
+        self.assertEqual(make_tuple(1, 2), (1, 2))
+        self.assertEqual(make_dict(a=1, b=2), dict(a=1, b=2))
+        self.assertEqual(rewrap_dict(dict(a=1, b=2)), dict(a=1, b=2))
+
+    async def test_var_changes(self):
+        a = var(1)
+        res = rewrap_dict(dict(a=a, b=2))
+        await wait_for_var(res)
+        self.assertIsInstance(res, Wrapped)
+        self.assertEqual(unwrap(res), dict(a=1, b=2))
+        a @= 3
+        await wait_for_var(res)
+        self.assertEqual(unwrap(res), dict(a=3, b=2))
+
+
 @reactive
 async def async_sum(a, b):
     return a + b